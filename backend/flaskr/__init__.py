@@ -4,6 +4,8 @@ from flask import Flask, request, abort
 from flask_cors import CORS
 from models import setup_db, Question, Category
 
+from .compression import CompressedBodyCache, compress_response
+
 QUESTIONS_PER_PAGE = 10
 
 
@@ -28,6 +30,7 @@ def create_app(test_config=None):
     app = Flask(__name__)
     setup_db(app)
     cors = CORS(app, resources={r"/*": {"origins": "*"}})
+    compressed_body_cache = CompressedBodyCache()
 
     @app.after_request
     def after_request(response):
@@ -35,7 +38,7 @@ def create_app(test_config=None):
                              'Content-Type, Authorization')
         response.headers.add('Access-Control-Allow-Headers',
                              'GET, POST, PATCH, DELETE, OPTIONS')
-        return response
+        return compress_response(response, compressed_body_cache)
 
     @app.route('/categories', methods=['GET'])
     def get_categories():
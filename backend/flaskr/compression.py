@@ -0,0 +1,204 @@
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = 500
+COMPRESSION_LEVEL = 6
+COMPRESSED_CACHE_SIZE = 128
+COMPRESSED_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain'}
+CACHEABLE_METHODS = {'GET', 'HEAD'}
+
+
+def supported_encodings():
+    if brotli is not None:
+        return ['br', 'gzip']
+    return ['gzip']
+
+
+def choose_encoding(accept_encoding):
+    """
+    Picks the best supported encoding from an Accept-Encoding header,
+    preferring brotli over gzip when the client weights them equally.
+    Returns None when the response should be sent uncompressed.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+
+    best_encoding = None
+    best_quality = 0.0
+    for encoding in supported_encodings():
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best_encoding = encoding
+            best_quality = quality
+
+    return best_encoding
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=COMPRESSION_LEVEL)
+    return gzip.compress(data, compresslevel=COMPRESSION_LEVEL)
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresses a streamed body chunk by chunk. Each chunk is flushed from
+    the compressor as soon as it is written, so clients receive data as
+    it is produced instead of at the end of the stream.
+    """
+    try:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=COMPRESSION_LEVEL)
+            for chunk in chunks:
+                data = compressor.process(as_bytes(chunk))
+                data += compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+            return
+
+        # wbits 16 + MAX_WBITS makes zlib write a gzip header and trailer
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED,
+                                      16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(as_bytes(chunk))
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        # werkzeug only closes response.response, which we replaced
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def as_bytes(chunk):
+    if isinstance(chunk, str):
+        return chunk.encode('utf-8')
+    return chunk
+
+
+class CompressedBodyCache:
+    """
+    Keeps compressed bodies of read responses keyed by the digest of the
+    uncompressed body, so identical payloads are only compressed once.
+    Only the compression step is skipped: the response itself is still
+    built and hashed on every request. Entries are bounded both by count
+    and by their total compressed size, so a few large listings cannot
+    grow the cache without limit.
+    """
+
+    def __init__(self, max_size=COMPRESSED_CACHE_SIZE,
+                 max_bytes=COMPRESSED_CACHE_MAX_BYTES):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_compress(self, data, encoding):
+        key = (hashlib.sha1(data).digest(), encoding)
+        with self.lock:
+            compressed = self.entries.get(key)
+            if compressed is not None:
+                self.entries.move_to_end(key)
+                return compressed
+
+        compressed = compress(data, encoding)
+        if len(compressed) > self.max_bytes:
+            return compressed
+
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = compressed
+                self.total_bytes += len(compressed)
+            while (len(self.entries) > self.max_size
+                   or self.total_bytes > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+        return compressed
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+def should_compress(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    # a byte range of the identity body must not be encoded on its own
+    if 'Content-Range' in response.headers:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    return True
+
+
+def set_content_encoding(response, encoding):
+    """
+    Marks the response as encoded and weakens a strong ETag, so the
+    compressed and identity variants don't share one strong validator.
+    """
+    response.headers['Content-Encoding'] = encoding
+    etag, is_weak = response.get_etag()
+    if etag is not None and not is_weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response, cache):
+    response.vary.add('Accept-Encoding')
+
+    if not should_compress(response):
+        return response
+
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        set_content_encoding(response, encoding)
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    if request.method in CACHEABLE_METHODS and response.status_code == 200:
+        compressed = cache.get_or_compress(data, encoding)
+    else:
+        compressed = compress(data, encoding)
+
+    response.set_data(compressed)
+    set_content_encoding(response, encoding)
+    return response
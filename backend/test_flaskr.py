@@ -1,8 +1,13 @@
+import gzip
 import json
 import unittest
+import zlib
 from random import randrange
+from unittest import mock
 
-from flaskr import create_app
+from werkzeug.wrappers import Response
+
+from flaskr import create_app, compression
 from models import setup_db, db, Question, Category
 
 
@@ -365,6 +370,159 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data['error'], 405)
         self.assertEqual(data['message'], 'method not allowed')
 
+    # Response Compression
+    def test_response_compression_gzip_when_accepted(self):
+        populate_db_with_categories(1)
+        populate_db_with_questions(10)
+
+        res = self.client().get('/questions',
+                                headers={'Accept-Encoding': 'gzip'})
+        data = json.loads(gzip.decompress(res.data))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res.headers['Vary'])
+        self.assertEqual(len(data['questions']), 10)
+
+    def test_response_compression_repeated_hits_compressed_once(self):
+        populate_db_with_categories(1)
+        populate_db_with_questions(10)
+
+        with mock.patch('flaskr.compression.compress',
+                        wraps=compression.compress) as compress:
+            first_res = self.client().get(
+                '/questions', headers={'Accept-Encoding': 'gzip'})
+            second_res = self.client().get(
+                '/questions', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first_res.data, second_res.data)
+
+    def test_response_compression_skipped_when_not_accepted(self):
+        populate_db_with_categories(1)
+        populate_db_with_questions(10)
+
+        res = self.client().get('/questions',
+                                headers={'Accept-Encoding': 'identity'})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('Content-Encoding', res.headers)
+        self.assertEqual(len(data['questions']), 10)
+
+    def test_response_compression_skipped_below_min_size(self):
+        res = self.client().get('/categories',
+                                headers={'Accept-Encoding': 'gzip'})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('Content-Encoding', res.headers)
+        self.assertEqual(len(data['categories']), 0)
+
+
+class CompressionTestCase(unittest.TestCase):
+    """This class represents the response compression helpers test case"""
+
+    def test_choose_encoding_gzip(self):
+        self.assertEqual(compression.choose_encoding('gzip'), 'gzip')
+
+    def test_choose_encoding_respects_q_values(self):
+        with mock.patch('flaskr.compression.supported_encodings',
+                        return_value=['br', 'gzip']):
+            self.assertEqual(
+                compression.choose_encoding('br;q=0.5, gzip;q=0.8'), 'gzip')
+            self.assertEqual(
+                compression.choose_encoding('gzip;q=0.5, br'), 'br')
+
+    def test_choose_encoding_wildcard(self):
+        with mock.patch('flaskr.compression.supported_encodings',
+                        return_value=['gzip']):
+            self.assertEqual(compression.choose_encoding('*'), 'gzip')
+        with mock.patch('flaskr.compression.supported_encodings',
+                        return_value=['br', 'gzip']):
+            self.assertEqual(compression.choose_encoding('*'), 'br')
+
+    def test_choose_encoding_none_for_identity(self):
+        self.assertIsNone(compression.choose_encoding('identity'))
+
+    def test_choose_encoding_none_for_zero_q_value(self):
+        with mock.patch('flaskr.compression.supported_encodings',
+                        return_value=['gzip']):
+            self.assertIsNone(compression.choose_encoding('gzip;q=0'))
+            self.assertIsNone(compression.choose_encoding('*, gzip;q=0'))
+        with mock.patch('flaskr.compression.supported_encodings',
+                        return_value=['br', 'gzip']):
+            self.assertIsNone(
+                compression.choose_encoding('gzip;q=0, br;q=0'))
+            self.assertEqual(
+                compression.choose_encoding('*, gzip;q=0'), 'br')
+
+    def test_should_compress_json(self):
+        response = Response('{}', mimetype='application/json')
+
+        self.assertTrue(compression.should_compress(response))
+
+    def test_should_compress_skips_partial_content(self):
+        response = Response('{}', status=206, mimetype='application/json')
+
+        self.assertFalse(compression.should_compress(response))
+
+    def test_should_compress_skips_content_range(self):
+        response = Response('{}', mimetype='application/json')
+        response.headers['Content-Range'] = 'bytes 0-1/2'
+
+        self.assertFalse(compression.should_compress(response))
+
+    def test_set_content_encoding_weakens_strong_etag(self):
+        response = Response('{}', mimetype='application/json')
+        response.set_etag('abc')
+
+        compression.set_content_encoding(response, 'gzip')
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.get_etag(), ('abc', True))
+
+    def test_compress_stream_emits_data_per_chunk(self):
+        chunks = ['{"id": %d}' % i for i in range(50)]
+        stream = compression.compress_stream(iter(chunks), 'gzip')
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        for chunk in chunks:
+            self.assertEqual(decompressor.decompress(next(stream)),
+                             chunk.encode('utf-8'))
+
+        decompressor.decompress(b''.join(stream))
+        self.assertTrue(decompressor.eof)
+
+    def test_compress_stream_closes_wrapped_iterable(self):
+        chunks = mock.MagicMock()
+        chunks.__iter__.return_value = iter([b'data'])
+
+        list(compression.compress_stream(chunks, 'gzip'))
+
+        chunks.close.assert_called_once()
+
+    def test_compressed_body_cache_compresses_once(self):
+        cache = compression.CompressedBodyCache()
+        data = b'x' * 1000
+
+        with mock.patch('flaskr.compression.compress',
+                        wraps=compression.compress) as compress:
+            first = cache.get_or_compress(data, 'gzip')
+            second = cache.get_or_compress(data, 'gzip')
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertIs(first, second)
+
+    def test_compressed_body_cache_evicts_over_max_bytes(self):
+        cache = compression.CompressedBodyCache(max_bytes=40)
+
+        cache.get_or_compress(b'a' * 1000, 'gzip')
+        cache.get_or_compress(b'b' * 1000, 'gzip')
+
+        self.assertEqual(len(cache.entries), 1)
+        self.assertLessEqual(cache.total_bytes, 40)
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":